@@ -1,8 +1,7 @@
-import io
-import yaml
-
-from yamlcls import yamlcls, yamlfield, asdict
+from yamlcls import yamlcls, yamlfield, asdict, load, ValueNotAnOption
 from typing import Any, Dict, List
+import gc
+import weakref
 
 # ONE SHOULD USE DIFFERENT METHODS THROUGHOUT THE TESTS
 # @yamlcls AND @yamlcls()
@@ -11,18 +10,18 @@ from typing import Any, Dict, List
 def raises(callable):
     try:
         callable()
-        raise Exception("Expected code to raise an Exception")
-    except Exception as e:
+    except Exception:
         return
+    raise AssertionError("Expected code to raise an Exception")
 
 def raises_for_type(t):
     try:
         @yamlcls
         class _:
             a: t
-        raise Exception(f"Expected: type {t} not to be allowed")
-    except:
+    except Exception:
         return
+    raise AssertionError(f"Expected: type {t} not to be allowed")
 
 
 def raises_for_default(t, default):
@@ -30,9 +29,9 @@ def raises_for_default(t, default):
         @yamlcls
         class _:
            a: t = default
-        raise Exception(f"Expected: default {type(t)} not to be allowed")
-    except:
+    except Exception:
         return
+    raise AssertionError(f"Expected: default {type(t)} not to be allowed")
 
 
 def ok_for_type(t):
@@ -114,7 +113,7 @@ def test_primitive_loading():
                 c: 1.1
                 d: false
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(**d)
 
     assert a.a == 1
@@ -148,7 +147,7 @@ def test_primitive_loading():
                 a: 1
                 b: "1"
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(**d)
 
     assert a.a == 1
@@ -156,6 +155,23 @@ def test_primitive_loading():
     assert a.c == 1.1
     assert a.d == False
 
+    # bool is a subclass of int but must not pass as one
+    @yamlcls
+    class A:
+        a: int
+        b: float
+
+    raises(lambda: A(a=True, b=1.1))
+    raises(lambda: A(a=1, b=1))
+    raises(lambda: A(a=1, b=False))
+
+    # classes with many fields use the resolvers instead of inlined checks
+    A = yamlcls(type("A", (), {"__annotations__": {f"f{i}": int for i in range(300)}}))
+    d = {f"f{i}": i for i in range(300)}
+    assert A(d).f299 == 299
+    d["f299"] = True
+    raises(lambda: A(d))
+
 def test_list_and_dict():
     @yamlcls
     class A:
@@ -167,12 +183,18 @@ def test_list_and_dict():
                 b:
                     inner: 1
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(**d)
 
     assert a.a == [1, 2, 3]
     assert a.b == {"inner": 1}
 
+    raises(lambda: A(a=[1, "1"], b={}))
+    raises(lambda: A(a=[1, True], b={}))
+    raises(lambda: A(a=[1], b={1: 1}))
+    raises(lambda: A(a=[1], b={None: 1}))
+    raises(lambda: A(a=[1], b={"inner": "1"}))
+
 def test_nested_list_and_dict():
     @yamlcls
     class A:
@@ -192,7 +214,7 @@ def test_nested_list_and_dict():
                 d:
                     a: [1, 2]
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(d)
 
     assert a.a == [[1, 2, 3]]
@@ -212,7 +234,7 @@ def test_class():
                 b:
                     a: 1
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(d)
 
     assert a.b.a == 1
@@ -228,7 +250,7 @@ def test_class():
                 b:
                     a: 1
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(**d)
 
     assert a.b.a == 1
@@ -248,11 +270,24 @@ def test_class():
                     c:
                         a: 1
             """
-    d = yaml.safe_load(io.StringIO(a_yaml))
+    d = load(a_yaml)
     a = A(**d)
 
     assert a.b.c.a == 1
 
+    # subclasses with their own __init__ still get kwargs
+    @yamlcls
+    class B:
+        a: int
+    class C(B):
+        def __init__(self, a):
+            self.a = a * 2
+    @yamlcls
+    class A:
+        c: C
+
+    assert A({"c": {"a": 1}}).c.a == 2
+
 def init_methods():
     @yamlcls
     class A:
@@ -265,6 +300,14 @@ def init_methods():
     a2 = asdict(A(**d))
     assert a1 == a2
 
+def test_init_module():
+    @yamlcls
+    class A:
+        a: int
+
+    assert A.__init__.__module__ == A.__module__
+    assert A.__init__.__qualname__.endswith("A.__init__")
+
 def test_str():
     @yamlcls()
     class A:
@@ -273,6 +316,14 @@ def test_str():
 
     a = A(a = 1)
     assert len(str(a)) > 0
+    assert str(a) == "A(a=1, b=a)"
+
+    @yamlcls(ignore_missing=True, slots=True)
+    class A:
+        a: int
+        b: int
+
+    assert str(A(b=2)) == "A(b=2)"
 
 def test_any():
     @yamlcls()
@@ -295,6 +346,13 @@ def test_any():
     assert a.a == d["a"]
     assert a.b == d["b"]
 
+    d = {"a": 1, "b": (1, 2)}
+    a = A(d)
+    assert a.b == d["b"]
+
+    raises(lambda: A(a=None, b=1))
+    raises(lambda: A(a=1, b=None))
+
 def test_default_factory_function():
     @yamlcls
     class A:
@@ -335,9 +393,9 @@ def test_yamlfield():
     a-b: 2
     """
 
-    a = A(yaml.safe_load(io.StringIO(yamlstr)))
+    a = A(load(yamlstr))
     assert a.a == 2
-    a = A(**yaml.safe_load(io.StringIO(yamlstr)))
+    a = A(**load(yamlstr))
     assert a.a == 2
 
     # default testing
@@ -379,7 +437,13 @@ def test_ignore_missing():
     a = A({"a": 2})
     assert a.a == 2
     assert not hasattr(a, "b")
+    assert asdict(a) == {"a": 2}
+    assert str(a) == "A(a=2)"
 
+    # fields set after the init show up as well
+    a.b = 3
+    assert asdict(a) == {"a": 2, "b": 3}
+    assert str(a) == "A(a=2, b=3)"
 
     @yamlcls(ignore_missing=False)
     class A:
@@ -395,8 +459,17 @@ def test_options():
 
     raises(lambda: A(a=3))
     raises(lambda: A(a='22'))
+    raises(lambda: A(a=[1]))
     A(a=2)
 
+    @yamlcls(ignore_unknown=True)
+    class A:
+        a: str = yamlfield(options = ["s", "b"])
+
+    raises(lambda: A(a="c"))
+    raises(lambda: A(a=["s"]))
+    A(a="s")
+
     @yamlcls()
     class A:
         a: List[int] = yamlfield(options = [[1, 2]])
@@ -404,9 +477,126 @@ def test_options():
     raises(lambda: A(a=3))
     A(a=[1, 2])
 
+    # hashable containers of unhashable values are not an option either
+    @yamlcls()
+    class A:
+        a: Any = yamlfield(options=[1, 2])
+    try:
+        A(a=([1],))
+        raise AssertionError("Expected ValueNotAnOption")
+    except ValueNotAnOption:
+        pass
+
     raises_for_default(int, yamlfield(options=["s", "b"]))
     ok_for_default(List[str], yamlfield(options=[["s"], ["b"]]))
 
+def test_classes_are_collected():
+    def create():
+        @yamlcls
+        class B:
+            a: int
+        @yamlcls(slots=True)
+        class A:
+            b: B
+            c: Dict[str, int] = lambda: dict()
+        A({"b": {"a": 1}})
+        return weakref.ref(A), weakref.ref(B)
+
+    refs = create()
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+def test_slots():
+    @yamlcls(slots=True)
+    class A:
+        a: int
+        b: str = "b"
+        c: Dict[str, int] = lambda: dict()
+
+    a = A(a=1)
+    assert not hasattr(a, "__dict__")
+    assert a.a == 1
+    assert a.b == "b"
+    assert a.c == {}
+    assert asdict(a) == {"a": 1, "b": "b", "c": {}}
+    raises(lambda: setattr(a, "d", 1))
+    assert weakref.ref(a)() is a
+
+    # __weakref__ is not added twice if a base provides it already
+    class B:
+        pass
+    @yamlcls(slots=True)
+    class C(B):
+        a: int
+    c = C(a=1)
+    assert weakref.ref(c)() is c
+
+    @yamlcls(slots=True, ignore_missing=True)
+    class A:
+        a: int
+        b: int
+
+    a = A({"a": 2})
+    assert a.a == 2
+    assert not hasattr(a, "b")
+
+    class A:
+        __annotations__ = {"a-b": int}
+    raises(lambda: yamlcls(A, slots=True))
+
+    # keywords are valid slot names
+    class A:
+        __annotations__ = {"class": int}
+    A = yamlcls(A, slots=True)
+    assert getattr(A({"class": 1}), "class") == 1
+
+def test_not_an_identifier():
+    class A:
+        __annotations__ = {"a-b": int, "class": str}
+
+    A = yamlcls(A)
+    a = A({"a-b": 1, "class": "c"})
+    assert getattr(a, "a-b") == 1
+    assert getattr(a, "class") == "c"
+    raises(lambda: A({"a-b": 1}))
+    raises(lambda: A({"a-b": 1, "class": "c", "d": 1}))
+
+    class A:
+        __annotations__ = {"a-b": int, "c": Dict[str, int], "d": str}
+        c = lambda: dict()
+        d = yamlfield(alias="dd", default="x", options=["x", "y"])
+
+    A = yamlcls(A, ignore_unknown=True)
+    a = A({"a-b": 1, "dd": "y", "e": 1})
+    assert asdict(a) == {"a-b": 1, "c": {}, "d": "y"}
+    raises(lambda: A({"a-b": 1, "dd": "z"}))
+    raises(lambda: A({"a-b": 1, "dd": ("x", [1])}))
+
+def test_init_paths_agree():
+    # fields which are not identifiers are set through setattr
+    class Plain:
+        __annotations__ = {"a": int, "b": int}
+        b = yamlfield(alias="bb", default=1)
+    class Special:
+        __annotations__ = {"a": int, "b": int, "a-b": int}
+        b = yamlfield(alias="bb", default=1)
+    Plain = yamlcls(Plain, ignore_missing=True)
+    Special = yamlcls(Special, ignore_missing=True)
+
+    def error_of(cls, d):
+        try:
+            cls(d)
+        except Exception as e:
+            return type(e)
+        return None
+
+    for d in ({"a": "x", "zz": 1}, {"a": None}, {"a": 1, "b": "x"}, {"zz": 1}):
+        assert error_of(Plain, d) is not None
+        assert error_of(Plain, d) is error_of(Special, d)
+
+    for d in ({"a": 1, "b": 2, "bb": 3}, {"a": 1, "bb": 3, "b": 2}, {"a": 1}):
+        assert asdict(Plain(d)) == asdict(Special(d))
+
 if __name__ == "__main__":
     test_type_validation()
     test_primitive_loading()
@@ -414,6 +604,7 @@ if __name__ == "__main__":
     test_nested_list_and_dict()
     test_class()
     init_methods()
+    test_init_module()
     test_str()
     test_any()
     test_default_factory_function()
@@ -421,3 +612,7 @@ if __name__ == "__main__":
     test_ignore_unknown()
     test_ignore_missing()
     test_options()
+    test_classes_are_collected()
+    test_slots()
+    test_not_an_identifier()
+    test_init_paths_agree()
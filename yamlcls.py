@@ -1,17 +1,26 @@
-import abc
 import itertools
 import inspect
-from typing import Any, Callable, Dict, List, Union, Type
+import keyword
+import sys
+import warnings
+from typing import Any, Callable, Dict, FrozenSet, IO, List, Set, Union, Type
 
 
 ########################
 # Helper Types
 #########################
 NoneType = type(None)
+# marks values which were not provided
+MISSING = object()
+# classes with more fields do not get primitive checks inlined into the
+# generated __init__ to keep its size reasonable
+INLINE_LIMIT = 200
 # all types which as primitives do not require any recursive type resolution
 PRIMITIVES = (str, int, float, bool)
 # all types which are allowed to be used for dictionary keys
 ALLOWED_DICT_KEY_TYPES = (str, int, float)
+# the exact types of keys ALLOWED_DICT_KEY_TYPES accepts (bool is an int)
+DICT_KEY_TYPES = frozenset((str, int, float, bool))
 # all types which are allowed to be used as type annotations
 ALLOWED_TYPE_ANNOTATIONS = (str, int, float, bool, dict, list, type, Any)
 # all types which are allowed to be default types for members.
@@ -29,14 +38,32 @@ VAR_DEFAULT_TYPES = (str, int, float, bool, Callable, NoneType)
 DefaultVarType = Union[Callable, str, int, float, bool, NoneType]
 
 
+# resolves a value of the variable's type. Takes the name for error
+# messages and the value, see build_resolver
+ResolverType = Callable[[str, Any], Any]
+
 class RequiredVar:
-    def __init__(self, type: Type):
+    def __init__(self, type: Type, resolver: ResolverType):
         self.type = type
+        self.resolver = resolver
+
+# kinds of defaults an optional variable can have
+KIND_CONST = 0      # i: int = 1
+KIND_FACTORY = 1    # d: Dict[int, int] = lambda: dict()
 
 class OptionalVar:
-    def __init__(self, type: Type, default: DefaultVarType):
+    def __init__(self,
+                 type: Type,
+                 resolver: ResolverType,
+                 default: DefaultVarType,
+                 kind: int,
+                 error_name: str):
         self.type = type
+        self.resolver = resolver
         self.default = default
+        self.kind = kind
+        # the name of the default in error messages
+        self.error_name = error_name
 
 class YamlField:
     def __init__(self,
@@ -47,15 +74,6 @@ class YamlField:
         self.default = default
         self.options = options
 
-class Resolver(abc.ABC):
-    @abc.abstractmethod
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        pass
-
-    @abc.abstractmethod
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        pass
-
 #########################
 # Helpers
 #########################
@@ -74,41 +92,54 @@ def generic_over(vtype: Type):
 
 def is_generic_list(vtype: Type):
     """ Check that List[..] """
-    return generic_of(vtype) == list and len(generic_over(vtype)) == 1
+    return generic_of(vtype) is list and len(generic_over(vtype)) == 1
 
 def is_generic_dict(vtype: Type):
     """ Check that Dict[.., ..] """
-    return generic_of(vtype) == dict and len(generic_over(vtype)) == 2
+    return generic_of(vtype) is dict and len(generic_over(vtype)) == 2
 
-def assert_type_annotation_allowed(name: str, vtype: Type):
+def assert_type_annotation_allowed(name: str, vtype: Type, checked: Set[Type]):
     """
     This function checks weather the type is allowed for eg. a class like:
     class A:
         name: vtype
+    checked holds the types which passed already (see yamlcls)
     """
-    if vtype in PRIMITIVES or vtype == Any:
+    # the name is only used for error messages so only successful
+    # checks are remembered
+    if vtype in checked:
+        return
+    _assert_type_annotation_allowed(name, vtype, checked)
+    checked.add(vtype)
+
+def _assert_type_annotation_allowed(name: str, vtype: Type, checked: Set[Type]):
+    if vtype in PRIMITIVES or vtype is Any:
         return
 
     # no untyped list and dicts because we cannot check them
-    if vtype in [dict, list]:
+    if vtype is dict or vtype is list:
         raise Exception(f"Cannot use untyped list or dict '{name}'")
-    if generic_of(vtype) in [list, dict] and generic_over(vtype) == None:
+
+    # look the generic up once instead of for every check
+    origin = generic_of(vtype)
+    args = generic_over(vtype)
+    if (origin is list or origin is dict) and args is None:
         raise Exception(f"Cannot used untyped List or Dict. Please add type hint(s)")
 
     # List[..] might be nested
-    if generic_of(vtype) == list:
-        assert_type_annotation_allowed(name, generic_over(vtype)[0])
+    if origin is list:
+        assert_type_annotation_allowed(name, args[0], checked)
         return
 
     # Dict[.., ..] might be nested
-    if generic_of(vtype) == dict:
-        dict_ktype, dict_vtype = generic_over(vtype)
-        if dict_ktype not in ALLOWED_DICT_KEY_TYPES and not dict_ktype == Any:
+    if origin is dict:
+        dict_ktype, dict_vtype = args
+        if dict_ktype not in ALLOWED_DICT_KEY_TYPES and dict_ktype is not Any:
             raise Exception(
                 f"The dictionary '{name}' cannot be annotated with type "
                 f"'{dict_ktype}' as only {ALLOWED_DICT_KEY_TYPES} are allowed")
         # value-types must be checked deeply
-        assert_type_annotation_allowed(name, dict_vtype)
+        assert_type_annotation_allowed(name, dict_vtype, checked)
         return
 
     # if not handled already let all allowed types pass
@@ -118,188 +149,326 @@ def assert_type_annotation_allowed(name: str, vtype: Type):
     # if annotated with a class then it is of type 'type' eg.
     # class A:
     #   block: Block
-    if type(vtype) == type:
+    if type(vtype) is type:
         return
 
     raise Exception(f"Unsupported type '{vtype.__class__}' of key '{name}'")
 
-def check_default(vname: str, vtype: Type, default: DefaultVarType) -> OptionalVar:
+def check_default(vname: str,
+                  vtype: Type,
+                  default: DefaultVarType,
+                  resolvers: Dict[Type, ResolverType]) -> OptionalVar:
     # type check the default before proceeding
     if not isinstance(default, VAR_DEFAULT_TYPES):
         raise Exception(
             f"Defaults must be of type {VAR_DEFAULT_TYPES}!! "
             f"You set {vname} to {type(default)}")
 
+    # the kind is decided once here and not for every instance
+    kind = KIND_FACTORY if inspect.isfunction(default) else KIND_CONST
+
     # type check the default before proceeding
     # this only works for non factory functions as it would
     # be considered unexpected behavior if the provided default
     # function is called during class definition
-    if not inspect.isfunction(default):
-        resolve_type(f"Default of {vname}", default, vtype)
+    error_name = f"Default of {vname}"
+    resolver = build_resolver(vtype, resolvers)
+    if kind == KIND_CONST:
+        resolver(error_name, default)
+
+    return OptionalVar(vtype, resolver, default, kind, error_name)
 
-    return OptionalVar(vtype, default)
+def options_lookup(options: List) -> Union[List, FrozenSet]:
+    """
+    Options which are all primitives are turned into a frozenset so
+    checking a value against them does not scan the list
+    """
+    if all(type(option) in PRIMITIVES for option in options):
+        return frozenset(options)
+    return options
+
+def is_option(value: Any, lookup: Union[List, FrozenSet]) -> bool:
+    try:
+        return value in lookup
+    # unhashable values are never in a frozenset
+    except TypeError:
+        return False
+
+def add_slots(cls: Type, names: List[str]) -> Type:
+    """
+    __slots__ cannot be added to an existing class so the class is
+    recreated with the fields as slots (like dataclasses does)
+    """
+    cls_dict = dict(cls.__dict__)
+    # keep the instances weak referenceable unless a base already does it
+    if not any(hasattr(base, "__weakref__") for base in cls.__bases__):
+        names = names + ["__weakref__"]
+    cls_dict["__slots__"] = tuple(names)
+    # class variables (the defaults) would conflict with the slots
+    for name in names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    new_cls.__qualname__ = cls.__qualname__
+    return new_cls
 
 #########################
 # Resolvers
 #########################
-class PrimitiveResolver(Resolver):
-    def __init__(self, target: Type):
-        self.target = target
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        return target == self.target
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        if not isinstance(value, target):
-            raise WrongType(name, value, target)
-        return value
-
-class DictResolver(Resolver):
-    def is_responsible(self, value: Any, target) -> bool:
-        return is_generic_dict(target)
-    def resolve(self, name: str, value: Any, target) -> Any:
-        if not isinstance(value, dict):
-            raise WrongType(name, value, target)
-
-        dict_ktype, dict_vtype = generic_over(target)
-
-        result = dict()
-        for k, v in value.items():
-            if not isinstance(k, ALLOWED_DICT_KEY_TYPES):
-                raise Exception(
-                    f"Key '{k}' was expected to be a primitive in '{name}'")
-
-            resolve_type(str(k), k, dict_ktype)
-            result[k] = resolve_type(name, v, dict_vtype)
-
-        return result
-
-class ListResolver(Resolver):
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        return is_generic_list(target)
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        if not isinstance(value, list):
-            raise WrongType(name, value, target)
-        [ltype] = generic_over(target)
-        return [resolve_type(name, n, ltype) for n in value]
-
-class ClassResolver(Resolver):
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        return not isinstance(target, PRIMITIVES) and type(target) == type
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        if not isinstance(value, dict):
-            raise WrongType(name, value, target)
-        return target(**value)
-
-class NoneResolver(Resolver):
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        return value is None
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        return value
-
-class AnyResolver(Resolver):
-    def is_responsible(self, value: Any, target: Type) -> bool:
-        return target == Any
-    def resolve(self, name: str, value: Any, target: Type) -> Any:
-        return value
-
-RESOLVERS = [
-    NoneResolver(),
-    AnyResolver(),
-
-    PrimitiveResolver(int),
-    PrimitiveResolver(float),
-    PrimitiveResolver(str),
-    PrimitiveResolver(bool),
-
-    ClassResolver(),
-
-    ListResolver(),
-    DictResolver(),
-]
+def build_resolver(vtype: Type, resolvers: Dict[Type, ResolverType]) -> ResolverType:
+    """
+    The resolver does not depend on anything but the type so variables
+    sharing a type share the resolver. resolvers memoizes them, it is
+    only kept while a class is created so that no class is held forever
+    """
+    resolver = resolvers.get(vtype)
+    if resolver is None:
+        resolver = resolvers[vtype] = _build_resolver(vtype, resolvers)
+    return resolver
+
+def _build_resolver(vtype: Type, resolvers: Dict[Type, ResolverType]) -> ResolverType:
+    """
+    Builds the resolver for a single type annotation once so that the
+    instantiation does not have to dispatch on the type again and again.
+    The returned callable is called as resolver(name, value)
+
+    Containers are checked with type() first as it is a single compare
+    for the plain lists and dicts yaml produces, isinstance only runs
+    for subclasses or wrong values.
+    """
+    if vtype is Any:
+        def _resolve(name: str, value: Any) -> Any:
+            return value
+        return _resolve
+
+    if vtype in PRIMITIVES:
+        def _resolve(name: str, value: Any) -> Any:
+            if value is None:
+                return value
+            # not isinstance as bool is a subclass of int
+            if type(value) is not vtype:
+                raise WrongType(name, value, vtype)
+            return value
+        return _resolve
+
+    if is_generic_list(vtype):
+        [ltype] = generic_over(vtype)
+
+        # the elements would not be transformed so the list is not rebuilt
+        if ltype is Any:
+            def _resolve(name: str, value: Any) -> Any:
+                if value is None:
+                    return value
+                if type(value) is not list and not isinstance(value, list):
+                    raise WrongType(name, value, vtype)
+                return value
+            return _resolve
+        if ltype in PRIMITIVES:
+            def _resolve(name: str, value: Any) -> Any:
+                if value is None:
+                    return value
+                if type(value) is not list and not isinstance(value, list):
+                    raise WrongType(name, value, vtype)
+                # this plain loop is as fast as checking set(map(type, value))
+                # and converting to an array first would cost more than it saves
+                for n in value:
+                    if type(n) is not ltype and n is not None:
+                        raise WrongType(name, n, ltype)
+                return value
+            return _resolve
+
+        inner = build_resolver(ltype, resolvers)
+        def _resolve(name: str, value: Any) -> Any:
+            if value is None:
+                return value
+            if type(value) is not list and not isinstance(value, list):
+                raise WrongType(name, value, vtype)
+            return [inner(name, n) for n in value]
+        return _resolve
+
+    if is_generic_dict(vtype):
+        dict_ktype, dict_vtype = generic_over(vtype)
+
+        # keys are always one of ALLOWED_DICT_KEY_TYPES (or Any) so they
+        # are checked inline rather than by another resolver
+        if dict_ktype is Any:
+            def _check_keys(name: str, value: Dict) -> None:
+                for k in value:
+                    # the set lookup is the fast path for exact types
+                    if type(k) not in DICT_KEY_TYPES and \
+                            not isinstance(k, ALLOWED_DICT_KEY_TYPES):
+                        raise Exception(
+                            f"Key '{k}' was expected to be a primitive in '{name}'")
+        else:
+            def _check_keys(name: str, value: Dict) -> None:
+                for k in value:
+                    if type(k) is not dict_ktype:
+                        raise WrongType(str(k), k, dict_ktype)
+
+        # the values would not be transformed so the dict is not rebuilt
+        if dict_vtype is Any or dict_vtype in PRIMITIVES:
+            any_value = dict_vtype is Any
+            def _resolve(name: str, value: Any) -> Any:
+                if value is None:
+                    return value
+                if type(value) is not dict and not isinstance(value, dict):
+                    raise WrongType(name, value, vtype)
+                _check_keys(name, value)
+                if not any_value:
+                    for v in value.values():
+                        if type(v) is not dict_vtype and v is not None:
+                            raise WrongType(name, v, dict_vtype)
+                return value
+            return _resolve
+
+        vinner = build_resolver(dict_vtype, resolvers)
+        def _resolve(name: str, value: Any) -> Any:
+            if value is None:
+                return value
+            if type(value) is not dict and not isinstance(value, dict):
+                raise WrongType(name, value, vtype)
+            _check_keys(name, value)
+            return {k: vinner(name, v) for k, v in value.items()}
+        return _resolve
+
+    if type(vtype) is type:
+        # classes created by yamlcls take the dict as it is which saves
+        # unpacking it into kwargs just to get a dict again. Not hasattr
+        # as subclasses inherit the fields but might have their own __init__
+        if "__yamlcls_fields__" in vtype.__dict__:
+            def _resolve(name: str, value: Any) -> Any:
+                if value is None:
+                    return value
+                if type(value) is not dict and not isinstance(value, dict):
+                    raise WrongType(name, value, vtype)
+                return vtype(value)
+            return _resolve
+
+        def _resolve(name: str, value: Any) -> Any:
+            if value is None:
+                return value
+            if type(value) is not dict and not isinstance(value, dict):
+                raise WrongType(name, value, vtype)
+            return vtype(**value)
+        return _resolve
+
+    raise Exception(f"Unsupported type '{vtype}'")
 
 def resolve_type(name: str, value: Any, vtype: Type) -> Any:
     """
     Ensures that value is of the expected type.
     The value might be recursivly resolved if it is nested.
     """
-
-    # instead of a long if elif else structure
-    # ask if threre is a resolver responsible and
-    # let it resolve the value. The predicate to
-    # test if a resolver is responsible can be
-    # more complicated than just to check the vtype
-    for res in RESOLVERS:
-        if res.is_responsible(value, vtype):
-            return res.resolve(name, value, vtype)
-
-    raise WrongType(name, value, vtype)
+    return build_resolver(vtype, {})(name, value)
 
 ##########################
 # Exported
 #########################
 
-class WrongType(Exception):
+class LazyMessageException(Exception):
+    """
+    Formats the message only once it is needed as many exceptions
+    are caught and never printed. Subclasses implement _format
+    """
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self._msg = None
+    @property
+    def msg(self) -> str:
+        if self._msg is None:
+            self._msg = self._format()
+        return self._msg
+    def __str__(self):
+        return self.msg
+
+class WrongType(LazyMessageException):
     TEMPLATE = "Wrong type '{actual}' with value '{value}' for key '{key}'. " +\
                "Expected '{target}'."
     def __init__(self, key: str, value: Any, target: Type) -> None:
-        self.msg = WrongType.TEMPLATE.format(
-            key=key,
-            value=value,
-            actual=getattr(type(value), '__name__', type(value)),
-            target=target,
+        super().__init__(key, value, target)
+        self.key = key
+        self.value = value
+        self.target = target
+    def _format(self) -> str:
+        return WrongType.TEMPLATE.format(
+            key=self.key,
+            value=self.value,
+            actual=getattr(type(self.value), '__name__', type(self.value)),
+            target=self.target,
         )
-        super().__init__(self)
-    def __str__(self):
-        return self.msg
 
-class UnknownArgument(Exception):
+class UnknownArgument(LazyMessageException):
     TEMPLATE = "Unknown argument '{value}' of type '{actual}' with key '{key}'."
     def __init__(self, key: str, value: Any) -> None:
-        self.msg = UnknownArgument.TEMPLATE.format(
-            key=key,
-            value=value,
-            actual=getattr(type(value), '__name__', type(value)),
+        super().__init__(key, value)
+        self.key = key
+        self.value = value
+    def _format(self) -> str:
+        return UnknownArgument.TEMPLATE.format(
+            key=self.key,
+            value=self.value,
+            actual=getattr(type(self.value), '__name__', type(self.value)),
         )
-        super().__init__(self)
-    def __str__(self):
-        return self.msg
 
-class MissingRequiredArgument(Exception):
+class MissingRequiredArgument(LazyMessageException):
     TEMPLATE = "Missing required argument '{key}' for '{parent}'"
     def __init__(self, key: str, parent: Type) -> None:
-        self.msg = MissingRequiredArgument.TEMPLATE.format(
-            key=key,
-            parent=parent,
+        super().__init__(key, parent)
+        self.key = key
+        self.parent = parent
+    def _format(self) -> str:
+        return MissingRequiredArgument.TEMPLATE.format(
+            key=self.key,
+            parent=self.parent,
         )
-        super().__init__(self)
-    def __str__(self):
-        return self.msg
 
-class UnsupportedType(Exception):
+class UnsupportedType(LazyMessageException):
     TEMPLATE = "Value of type '{type}' is not supported"
     def __init__(self, value: Any) -> None:
-        self.msg = UnsupportedType.TEMPLATE.format(
-            type=getattr(type(value), '__name__', type(value)),
+        super().__init__(value)
+        self.value = value
+    def _format(self) -> str:
+        return UnsupportedType.TEMPLATE.format(
+            type=getattr(type(self.value), '__name__', type(self.value)),
         )
-        super().__init__(self)
-    def __str__(self):
-        return self.msg
 
-class ValueNotAnOption(Exception):
+class ValueNotAnOption(LazyMessageException):
     TEMPLATE = "Value of type '{type}' with value '{value}' is not an option. " +\
                 "Choose on of: {options}"
     def __init__(self, value: Any, options: List) -> None:
-        self.msg = UnsupportedType.TEMPLATE.format(
-            type=getattr(type(value), '__name__', type(value)),
-            value=value,
-            options=options
+        super().__init__(value, options)
+        self.value = value
+        self.options = options
+    def _format(self) -> str:
+        return ValueNotAnOption.TEMPLATE.format(
+            type=getattr(type(self.value), '__name__', type(self.value)),
+            value=self.value,
+            options=self.options
         )
-        super().__init__(self)
-    def __str__(self):
-        return self.msg
+
+def load(src: Union[str, bytes, IO]) -> Any:
+    """
+    Parses yaml using the C implementation of PyYAML if it is available.
+    PyYAML is only needed when this function is used.
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", None)
+    if loader is None:
+        warnings.warn("PyYAML was built without libyaml, using the slower SafeLoader")
+        loader = yaml.SafeLoader
+    return yaml.load(src, Loader=loader)
 
 def asdict(inst):
-    names = [name for name, _ in get_annotations(inst.__class__)]
-    return {name: getattr(inst, name) for name in names if hasattr(inst, name)}
+    names = getattr(type(inst), "__yamlcls_fields__", None)
+    # not decorated with yamlcls
+    if names is None:
+        names = [name for name, _ in get_annotations(type(inst))]
+    # getattr with a default works for __dict__ and __slots__
+    values = ((name, getattr(inst, name, MISSING)) for name in names)
+    return {name: value for name, value in values if value is not MISSING}
 
 def yamlfield(alias: str = None,
               default: DefaultVarType = None,
@@ -316,7 +485,10 @@ def yamlfield(alias: str = None,
     # keep the internal representation hidden from the user
     return YamlField(alias=alias, default=default, options=options)
 
-def yamlcls(cls=None, ignore_missing: bool = False, ignore_unknown: bool = False):
+def yamlcls(cls=None,
+            ignore_missing: bool = False,
+            ignore_unknown: bool = False,
+            slots: bool = False):
     """ EVERYTHING NEEES A TYPE HINT!! """
     def _create_init(cls,
                      required: Dict[str, RequiredVar],
@@ -324,120 +496,166 @@ def yamlcls(cls=None, ignore_missing: bool = False, ignore_unknown: bool = False
                      alias: Dict[str, str],
                      options: Dict[str, List],
                     ):
-        def _chose_init_source(args: List, kwargs: Dict) -> Dict[Any, Any]:
+        """
+        Just like dataclasses does, generate the source of a specialized
+        __init__ and exec it. All names the generated code needs are
+        provided through its globals.
+        """
+        globs = {
+            "_cls_name": cls.__name__,
+            "_known": frozenset(alias),
+            "WrongType": WrongType,
+            "UnknownArgument": UnknownArgument,
+            "MissingRequiredArgument": MissingRequiredArgument,
+            "UnsupportedType": UnsupportedType,
+            "ValueNotAnOption": ValueNotAnOption,
+            "is_option": is_option,
+        }
+
+        lines = [
+            "def __init__(self, *args, **kwargs):",
             # guard against miss-usage
-            if min(1, len(args)) + min(1, len(kwargs)) > 1:
-                raise Exception(
-                    f"Init '{cls.__name__}' with either with a dict or kwargs!")
-
-            # one dict was provided?
-            if len(args) > 0:
-                if not isinstance(args[0], dict):
-                    raise Exception(
-                        f"Init '{cls.__name__}' with either with a dict or kwargs! "
-                        f"You passed {type(args[0]).__name__}.")
-                return args[0]
-
-            return kwargs
-
-
-        def _init(self, *args, **kwargs):
-            init_dict = _chose_init_source(args, kwargs)
-
-            rset = {name: False for name in required}
-            oset = {name: False for name in optional}
-
-            for k, v in init_dict.items():
-                # translate the yaml name to the class name
-                if k not in alias:
-                    if not ignore_unknown:
-                        raise UnknownArgument(k, v)
-                    continue
-
-                # translate yaml-name to internal one
-                k, yamlname = alias[k], k
-
-                # determine what dict we are using for other operations
-                source = None
-                if k in rset:
-                    rset[k] = True
-                    source = required
-                elif k in oset:
-                    oset[k] = True
-                    source = optional
+            "    if args and kwargs:",
+            "        raise Exception(",
+            "            f\"Init '{_cls_name}' with either with a dict or kwargs!\")",
+            # one dict was provided? (the type check is the fast path
+            # for plain dicts, isinstance allows subclasses)
+            "    if args:",
+            "        d = args[0]",
+            "        if type(d) is not dict and not isinstance(d, dict):",
+            "            raise Exception(",
+            "                f\"Init '{_cls_name}' with either with a dict or kwargs! \"",
+            "                f\"You passed {type(d).__name__}.\")",
+            "    else:",
+            "        d = kwargs",
+        ]
+        # unknown arguments are rejected before anything is set
+        if not ignore_unknown:
+            lines += [
+                "    if not d.keys() <= _known:",
+                "        for k, v in d.items():",
+                "            if k not in _known:",
+                "                raise UnknownArgument(k, v)",
+            ]
+
+        def assign(vname: str, value: str) -> str:
+            # names which are no identifiers (see __annotations__) or are
+            # keywords cannot be written as attributes
+            if vname.isidentifier() and not keyword.iskeyword(vname):
+                return f"self.{vname} = {value}"
+            return f"setattr(self, {vname!r}, {value})"
+
+        # checks of primitives and Any are written into the function instead
+        # of calling the resolver, unless the function would get huge
+        inline = len(required) + len(optional) <= INLINE_LIMIT
+
+        for index, vname in enumerate(itertools.chain(required, optional)):
+            var = required[vname] if vname in required else optional[vname]
+            # the globals of a field are named after it. Identifiers never
+            # start with a digit so the index of other names cannot clash
+            g = vname if vname.isidentifier() else str(index)
+            globs[f"_resolve_{g}"] = var.resolver
+            globs[f"_type_{g}"] = var.type
+            if vname in options:
+                globs[f"_options_{g}"] = options[vname]
+                globs[f"_lookup_{g}"] = options_lookup(options[vname])
+
+            # a field might be reachable under more than one yaml-name.
+            # Note: a separate path assigning all variables in one tuple
+            # store when exactly the required keys are given was measured
+            # slower, comparing the keys and scanning for None costs more
+            yamlnames = [yname for yname, name in alias.items() if name == vname]
+            for i, yamlname in enumerate(yamlnames):
+                lines.append(f"    {'el' if i else ''}if {yamlname!r} in d:")
+                lines.append(f"        v = d[{yamlname!r}]")
+                # the resolvers check the type, but accept None as it is
+                # fine for nested values
+                lines.append("        if v is None:")
+                lines.append("            raise UnsupportedType(v)")
+                if vname in options:
+                    lines.append(f"        if not is_option(v, _lookup_{g}):")
+                    lines.append(f"            raise ValueNotAnOption(v, _options_{g})")
+                if inline and var.type in PRIMITIVES:
+                    lines.append(f"        if type(v) is not _type_{g}:")
+                    lines.append(f"            raise WrongType({yamlname!r}, v, _type_{g})")
+                    lines.append(f"        {assign(vname, 'v')}")
+                elif inline and var.type is Any:
+                    lines.append(f"        {assign(vname, 'v')}")
                 else:
-                    raise Exception(
-                        f"Programming error... {k} should be either required "
-                        f"or optional")
-
-                if not isinstance(v, (str, int, float, list, dict)):
-                    raise UnsupportedType(v)
-
-                if k in options:
-                    if v not in options[k]:
-                        raise ValueNotAnOption(v, options[k])
+                    lines.append(f"        {assign(vname, f'_resolve_{g}({yamlname!r}, v)')}")
 
-                v = resolve_type(yamlname, v, source[k].type)
-                setattr(self, k, v)
-
-            # ensure that all required variables are set
-            for k, isset in rset.items():
-                if not isset and not ignore_missing:
-                    raise MissingRequiredArgument(k, cls.__name__)
-
-            # fill defaults for unset variables
-            for k, isset in oset.items():
-                if isset:
+            if vname in required:
+                if ignore_missing:
                     continue
-
-                default = optional[k].default
-                if inspect.isfunction(default):
-                    default = default()
-                    resolve_type(f"Default of {k}", default, optional[k].type)
-                    setattr(self, k, default)
+                missing = f"raise MissingRequiredArgument({vname!r}, _cls_name)"
+            else:
+                globs[f"_default_{g}"] = optional[vname].default
+                if optional[vname].kind == KIND_FACTORY:
+                    missing = (f"v = _default_{g}(); "
+                               f"_resolve_{g}({optional[vname].error_name!r}, v); "
+                               f"{assign(vname, 'v')}")
                 else:
-                    setattr(self, k, default)
+                    missing = assign(vname, f"_default_{g}")
 
+            if yamlnames:
+                lines.append("    else:")
+                lines.append(f"        {missing}")
+            else:
+                lines.append(f"    {missing}")
+
+        exec("\n".join(lines), globs)
+        _init = globs["__init__"]
+        _init.__qualname__ = f"{cls.__qualname__}.__init__"
+        _init.__module__ = cls.__module__
         return _init
 
     def _create_to_str(cls,
                        required: Dict[str, RequiredVar],
                        optional: Dict[str, OptionalVar]):
+        cls_name = cls.__name__
+        names = tuple(itertools.chain(required, optional))
         def _str(self):
-            s = f"{cls.__name__}("
-            args = itertools.chain(required.keys(), optional.keys())
-            args = filter(lambda name: hasattr(self, name), args)
-            s += ", ".join(map(lambda name: f"{name}={getattr(self, name)}", args))
-            s += ")"
-            return s
+            # getattr with a default works for __dict__ and __slots__
+            values = ((name, getattr(self, name, MISSING)) for name in names)
+            args = ", ".join(f"{name}={value}" for name, value in values
+                             if value is not MISSING)
+            return f"{cls_name}({args})"
         return _str
 
     def wrap(cls):
         """ Create __init__ and __str__ based on annotations of the class """
 
-        required: Dict[str, RequiredVar] = dict()
-        optional: Dict[str, OptionalVar] = dict()
-        alias: Dict[str, str] = dict() # yaml-name to class-name
-        options: Dict[str, List] = dict()
+        required: Dict[str, RequiredVar] = {}
+        optional: Dict[str, OptionalVar] = {}
+        alias: Dict[str, str] = {} # yaml-name to class-name
+        options: Dict[str, List] = {}
+        # types which were checked and their resolvers. They only live as
+        # long as the class is created so no class is kept alive by them
+        checked_types: Set[Type] = set()
+        type_resolvers: Dict[Type, ResolverType] = {}
 
-        missing = "__MISSING__"
+        # the annotations are read once per class.
+        # interned yaml-names make the lookups in alias compare by
+        # identity first. Names which are identifiers are interned by
+        # python already, others (see __annotations__) and aliases not
+        annotations = [(sys.intern(vname), vtype) for vname, vtype in get_annotations(cls)]
 
-        for vname, vtype in get_annotations(cls):
-            assert_type_annotation_allowed(vname, vtype)
+        for vname, vtype in annotations:
+            assert_type_annotation_allowed(vname, vtype, checked_types)
 
             # resolve default and classify as req or opt
-            default = getattr(cls, vname, missing)
+            default = getattr(cls, vname, MISSING)
             # no default given
-            if default == missing:
-                required[vname] = RequiredVar(vtype)
+            if default is MISSING:
+                required[vname] = RequiredVar(vtype, build_resolver(vtype, type_resolvers))
                 alias[vname] = vname
             # yamlfield was used so this field is special
             elif isinstance(default, YamlField):
                 # default value handling
                 if default.default is None:
-                    required[vname] = RequiredVar(vtype)
+                    required[vname] = RequiredVar(vtype, build_resolver(vtype, type_resolvers))
                 else:
-                    optional[vname] = check_default(vname, vtype, default.default)
+                    optional[vname] = check_default(vname, vtype, default.default, type_resolvers)
                     alias[vname] = vname
 
                 if default.options is not None:
@@ -446,15 +664,24 @@ def yamlcls(cls=None, ignore_missing: bool = False, ignore_unknown: bool = False
 
                 # alias handling
                 if default.alias is not None:
-                    alias[default.alias] = vname
+                    alias[sys.intern(default.alias)] = vname
                 else:
                     alias[vname] = vname
 
             # normal optional argument
             else:
-                optional[vname] = check_default(vname, vtype, default)
+                optional[vname] = check_default(vname, vtype, default, type_resolvers)
                 alias[vname] = vname
 
+        setattr(cls, "__yamlcls_fields__", tuple(name for name, _ in annotations))
+        if slots:
+            # __slots__ must be identifiers (keywords are fine though)
+            if not all(name.isidentifier() for name in itertools.chain(required, optional)):
+                raise Exception(
+                    f"Cannot use slots for '{cls.__name__}' as not all of its "
+                    "fields are valid identifiers")
+            cls = add_slots(cls, list(itertools.chain(required, optional)))
+
         setattr(cls, "__init__", _create_init(cls, required, optional, alias, options))
         setattr(cls, "__str__", _create_to_str(cls, required, optional))
         return cls
@@ -464,6 +691,7 @@ def yamlcls(cls=None, ignore_missing: bool = False, ignore_unknown: bool = False
 __all__ = [
     "yamlcls",
     "asdict",
+    "load",
     "yamlfield",
     "WrongType",
     "UnknownArgument",